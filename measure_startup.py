@@ -0,0 +1,96 @@
+"""
+TIME-TO-FIRST-RENDER MEASUREMENTS
+=================================
+Times the cold-start path of the dashboard, each stage in a fresh interpreter
+so modules loaded by one stage never hide the import cost of the next:
+
+  import   - importing the app on top of streamlit itself
+  restore  - restoring a season snapshot built from the given files
+  render   - first full script run, on the landing page and on a restored season
+
+Run with: python measure_startup.py [xml files or folders] [--runs N]
+Without files only the import and landing page render are measured.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(APP_DIR, 'streamlit_basketball_app.py')
+
+IMPORT_STAGE = """
+import json, sys, time
+start = time.perf_counter()
+import streamlit
+streamlit_done = time.perf_counter()
+import streamlit_basketball_app
+app_done = time.perf_counter()
+print(json.dumps({
+    'streamlit': (streamlit_done - start) * 1000,
+    'app': (app_done - streamlit_done) * 1000,
+    'numpy loaded': 'numpy' in sys.modules,
+}))
+"""
+
+SEED_STAGE = """
+import json, sys
+import streamlit_basketball_app as app
+files = app.read_xml_files(sys.argv[1:])
+app.save_snapshot(app.analyze_files(files, app.analysis_key(files)))
+print(json.dumps({'files': len(files)}))
+"""
+
+RESTORE_STAGE = """
+import json, time
+import streamlit_basketball_app as app
+start = time.perf_counter()
+result = app.restore_snapshot()
+print(json.dumps({'restore': (time.perf_counter() - start) * 1000, 'games': len(result.games) if result else 0}))
+"""
+
+RENDER_STAGE = """
+import json, time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_file(%r, default_timeout=120)
+at.run()
+print(json.dumps({'render': (time.perf_counter() - start) * 1000, 'errors': len(at.exception)}))
+""" % APP_PATH
+
+def run_stage(code, snapshot_dir, args=()):
+    env = dict(os.environ, CU_SNAPSHOT_DIR=snapshot_dir)
+    proc = subprocess.run([sys.executable, '-c', code, *args], cwd=APP_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def measure(name, code, snapshot_dir, runs):
+    samples = [run_stage(code, snapshot_dir) for _ in range(runs)]
+    for field, value in samples[0].items():
+        if isinstance(value, float):
+            value = f"{statistics.median(sample[field] for sample in samples):8.1f} ms"
+        print(f"  {name:<18} {field:<14} {value}")
+
+def main(argv):
+    runs = 3
+    if '--runs' in argv:
+        i = argv.index('--runs')
+        runs = int(argv[i + 1])
+        argv = argv[:i] + argv[i + 2:]
+
+    with tempfile.TemporaryDirectory() as empty_dir, tempfile.TemporaryDirectory() as snapshot_dir:
+        print(f"Median of {runs} fresh interpreter run(s)")
+        measure('import', IMPORT_STAGE, empty_dir, runs)
+        measure('render (landing)', RENDER_STAGE, empty_dir, runs)
+
+        if argv:
+            run_stage(SEED_STAGE, snapshot_dir, [os.path.abspath(path) for path in argv])
+            measure('restore', RESTORE_STAGE, snapshot_dir, runs)
+            measure('render (restored)', RENDER_STAGE, snapshot_dir, runs)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -3,17 +3,48 @@ CU WOMEN'S BASKETBALL ANALYTICS - STREAMLIT APP
 ================================================
 Interactive cloud-based dashboard with file upload
 Run with: streamlit run streamlit_basketball_app.py
+Local stats API: python streamlit_basketball_app.py --serve-api <xml files or folders>
 """
 
 import streamlit as st
 import xml.etree.ElementTree as ET
 import json
 import math
-import pandas as pd
-from collections import defaultdict, Counter
-from datetime import datetime
-import tempfile
+import glob
+import gzip
+import copy
+import csv
+import hashlib
+import importlib
+import io
+import itertools
 import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict, Counter, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from types import MappingProxyType
+
+class LazyModule:
+    """Stands in for a heavy module until first use, keeping it off the landing page's import path."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self._name)
+        # Later lookups hit the instance dict directly instead of coming back here
+        vars(self).update(vars(module))
+        return getattr(module, attr)
+
+# Only needed once games are parsed or a snapshot is restored
+np = LazyModule('numpy')
 
 # Page config
 st.set_page_config(
@@ -80,6 +111,120 @@ CU_ROSTER = {
     'WILLIAMS,SANAA': {'name': 'Sanaa Williams', 'pos': 'G', 'number': 4},
 }
 
+# Box score schema: (stat, XML attribute on <stats>). Each stat becomes a
+# season total on PlayerStats, so adding a stat is one line here.
+BOX_STATS = (
+    ('minutes', 'min'),
+    ('points', 'tp'),
+    ('fgm', 'fgm'),
+    ('fga', 'fga'),
+    ('fgm3', 'fgm3'),
+    ('fga3', 'fga3'),
+    ('ftm', 'ftm'),
+    ('fta', 'fta'),
+    ('oreb', 'oreb'),
+    ('dreb', 'dreb'),
+    ('rebounds', 'treb'),
+    ('assists', 'ast'),
+    ('steals', 'stl'),
+    ('blocks', 'blk'),
+    ('turnovers', 'to'),
+    ('plus_minus', 'plusminus'),
+    ('paint_points', 'pts_paint'),
+    ('fastbreak_points', 'pts_fastb'),
+    ('second_chance_points', 'pts_ch2'),
+)
+BOX_INDEX = {stat: i for i, (stat, _) in enumerate(BOX_STATS)}
+
+# Per-period stats captured from <statsbyprd>, as (stat, XML attribute)
+PERIOD_STATS = (
+    ('minutes', 'min'),
+    ('points', 'tp'),
+    ('fgm', 'fgm'),
+    ('fga', 'fga'),
+)
+REGULATION_PERIODS = 4
+
+# Shot zones, their point value, and the <play> types that imply a paint shot
+SHOT_ZONES = ('Paint', 'Mid-Range', 'Three')
+ZONE_POINTS = (2, 2, 3)
+PAINT_SHOT_TYPES = ('LAYUP', 'DUNK', 'TIPIN')
+# Shot distance band edges in feet, and the shot clock reading counted as late
+DISTANCE_BANDS = (4, 10, 16, 22)
+LATE_CLOCK_SECONDS = 7
+# Play coordinates are assumed to be feet on a 94x50 court, baskets 5.25ft from each baseline
+COURT_LENGTH = 94.0
+COURT_WIDTH = 50.0
+BASKET_OFFSET = 5.25
+THREE_POINT_DISTANCE = 22.15
+# Columns of GameData.shots
+SHOT_SHOOTER, SHOT_ZONE, SHOT_MADE, SHOT_DISTANCE, SHOT_CLOCK = range(5)
+
+# Leaderboard metrics and the qualification pools each is ranked within
+LEADERBOARD_METRICS = {
+    'ppg': lambda p: p.ppg,
+    'mpg': lambda p: p.mpg,
+    'plus_minus': lambda p: p.plus_minus,
+    'ts_pct': lambda p: p.ts_pct,
+    'stocks': lambda p: p.spg + p.bpg,
+    'fastbreak_points': lambda p: p.fastbreak_points,
+    'clutch_plus_minus': lambda p: p.close_game_stats['plus_minus'],
+}
+LEADERBOARD_POOLS = {
+    'all': lambda p: True,
+    'played': lambda p: p.games > 0,
+    'qualified': lambda p: p.games >= 3,
+    'qualified_shooters': lambda p: p.games >= 3 and p.fga >= 20,
+}
+
+# Memory budget for analyzed seasons shared across all sessions
+ANALYSIS_CACHE_MAX_BYTES = 512 * 1024 * 1024
+ANALYSIS_WORKERS = 2
+# Finished jobs nobody collected (closed tabs) are dropped after this long
+JOB_RETENTION_SECONDS = 10 * 60
+# How often a job waiting on another session's analysis checks for cancellation
+JOB_CANCEL_POLL_SECONDS = 0.25
+
+# Last analyzed season, restored on cold start so the dashboard is populated immediately
+SNAPSHOT_DIR = os.environ.get('CU_SNAPSHOT_DIR') or os.path.join(os.path.dirname(os.path.abspath(__file__)), '.season_snapshot')
+
+# Local stats API
+API_HOST = '127.0.0.1'
+API_PORT = 8765
+
+# Sidebar exports, written in chunks and cached on disk per dataset version
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), 'cu_basketball_exports')
+EXPORT_CHUNK_BYTES = 64 * 1024
+# Bumped whenever export rows change, so cached files from older code are not reused
+EXPORT_FORMAT = 1
+# Cached exports are kept for this many of the most recently used datasets
+EXPORT_KEEP_VERSIONS = 4
+# Above this much source XML, exports are streamed from the local stats API
+# instead of being held in memory for a download button
+EXPORT_INLINE_MAX_BYTES = 50 * 1024 * 1024
+EXPORT_ROUTE = '/api/exports/'
+EXPORT_FIELDS = {
+    'players': (
+        'name', 'number', 'position', 'games', 'mpg', 'ppg', 'rpg', 'apg', 'spg', 'bpg',
+        'fg_pct', 'fg3_pct', 'efg_pct', 'ts_pct', 'per', 'plus_minus', 'paint_points',
+        'fastbreak_points', 'second_chance_points',
+    ),
+    'game_logs': (
+        'player', 'game_id', 'date', 'opponent', 'result', 'home_away', 'points',
+        'rebounds', 'assists', 'plus_minus', 'is_close',
+    ),
+    'plays': (
+        'game_id', 'date', 'action', 'checkname', 'type', 'paint', 'x', 'y',
+        'shot_clock', 'assist_by',
+    ),
+}
+EXPORT_FORMATS = {
+    'NDJSON (all records)': ('ndjson', ('players', 'game_logs', 'plays')),
+    'CSV - Players': ('csv', ('players',)),
+    'CSV - Game Logs': ('csv', ('game_logs',)),
+    'CSV - Plays': ('csv', ('plays',)),
+}
+
 # Helper functions (same as before)
 def safe_float(value, default=0.0):
     try:
@@ -93,11 +238,28 @@ def safe_int(value, default=0):
     except (ValueError, TypeError):
         return default
 
+def parse_timestamp(value):
+    """Normalizes a StatCrew timestamp to a sortable ISO string ('' if missing or unknown)."""
+    for fmt in ('%m/%d/%Y %H:%M:%S', '%m/%d/%Y %I:%M:%S %p', '%m/%d/%Y %H:%M', '%m/%d/%Y %I:%M %p', '%m/%d/%Y', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d'):
+        try:
+            return datetime.strptime((value or '').strip(), fmt).isoformat()
+        except ValueError:
+            continue
+    return ''
+
 def safe_divide(numerator, denominator, decimals=1):
     if denominator == 0:
         return 0.0
     return round(numerator / denominator, decimals)
 
+def extract_row(elem, schema, out):
+    """Fills `out` with the schema's integer attributes of `elem` in one pass."""
+    attrib = elem.attrib
+    try:
+        out[:] = [int(attrib.get(attr) or 0) for _, attr in schema]
+    except ValueError:
+        out[:] = [safe_int(attrib.get(attr), 0) for _, attr in schema]
+
 def get_roster_name(checkname):
     if not checkname or checkname == "TEAM":
         return None
@@ -110,37 +272,67 @@ class PlayerStats:
         self.number = number
         self.position = position
         self.games = 0
-        self.minutes = 0
-        self.points = 0
-        self.fgm = 0
-        self.fga = 0
-        self.fgm3 = 0
-        self.fga3 = 0
-        self.ftm = 0
-        self.fta = 0
-        self.oreb = 0
-        self.dreb = 0
-        self.assists = 0
-        self.steals = 0
-        self.blocks = 0
-        self.turnovers = 0
-        self.plus_minus = 0
-        self.paint_fgm = 0
-        self.paint_fga = 0
-        self.perimeter_fgm = 0
-        self.perimeter_fga = 0
-        self.paint_points = 0
-        self.fastbreak_points = 0
-        self.second_chance_points = 0
+        self.totals = [0] * len(BOX_STATS)
         self.assisted_fgm = 0
         self.unassisted_fgm = 0
         self.assisted_by = Counter()
         self.assists_to = Counter()
-        self.quarter_stats = {1: {}, 2: {}, 3: {}, 4: {}}
         self.close_game_stats = {'points': 0, 'fgm': 0, 'fga': 0, 'minutes': 0, 'plus_minus': 0}
         self.game_log = []
         self.vs_opponent = defaultdict(lambda: {'points': 0, 'fgm': 0, 'fga': 0, 'games': 0})
 
+    def __getattr__(self, name):
+        # Box score totals (points, fgm, ...) are served from the schema-driven vector
+        i = BOX_INDEX.get(name)
+        if i is None:
+            raise AttributeError(name)
+        return self.totals[i]
+
+    def __setattr__(self, name, value):
+        if self.__dict__.get('_frozen'):
+            raise AttributeError("PlayerStats is read-only once published")
+        # An instance attribute would silently shadow the schema-driven total
+        if name in BOX_INDEX:
+            raise AttributeError(f"'{name}' is a box score total; update totals[BOX_INDEX['{name}']] instead")
+        super().__setattr__(name, value)
+
+    def freeze(self):
+        """Makes these stats read-only so they can be shared between sessions."""
+        if self.__dict__.get('_frozen'):
+            return
+        self.totals = tuple(self.totals)
+        self.game_log = tuple(MappingProxyType(entry) for entry in self.game_log)
+        self.assisted_by = FrozenCounter(self.assisted_by)
+        self.assists_to = FrozenCounter(self.assists_to)
+        self.close_game_stats = MappingProxyType(self.close_game_stats)
+        self.vs_opponent = MappingProxyType(dict(self.vs_opponent))
+        self._frozen = True
+
+    def thawed(self):
+        """Returns a mutable copy of these stats."""
+        stats = copy.copy(self)
+        stats.__dict__.update(
+            _frozen=False,
+            totals=list(self.totals),
+            game_log=[dict(entry) for entry in self.game_log],
+            assisted_by=Counter(self.assisted_by),
+            assists_to=Counter(self.assists_to),
+            close_game_stats=dict(self.close_game_stats),
+            vs_opponent=defaultdict(lambda: {'points': 0, 'fgm': 0, 'fga': 0, 'games': 0}, copy.deepcopy(dict(self.vs_opponent))),
+        )
+        return stats
+
+class FrozenCounter(Counter):
+    """Counter that rejects changes once built."""
+
+    def __init__(self, counts=()):
+        dict.update(self, counts)
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("FrozenCounter is read-only")
+
+    __setitem__ = __delitem__ = update = subtract = clear = pop = popitem = setdefault = _read_only
+
 class GameData:
     def __init__(self):
         self.date = ""
@@ -149,45 +341,95 @@ class GameData:
         self.opp_score = 0
         self.result = ""
         self.home_away = ""
-        self.quarters = {'1': 0, '2': 0, '3': 0, '4': 0}
-        self.opp_quarters = {'1': 0, '2': 0, '3': 0, '4': 0}
-        self.player_stats = {}
+        self.quarters = {}
+        self.opp_quarters = {}
+        self.num_periods = REGULATION_PERIODS
+        self.players = []
+        self.box = None
+        self.period_stats = None
+        self.shooters = []
+        self.shots = None
         self.plays = []
         self.is_close_game = False
+        self.home_id = ""
+        self.vis_id = ""
+        self.location = ""
+        self.game_id = ""
+        self.generated = ""
+        self.content_hash = ""
+
+    def __setattr__(self, name, value):
+        if self.__dict__.get('_frozen'):
+            raise AttributeError("GameData is read-only once published")
+        super().__setattr__(name, value)
+
+    def freeze(self):
+        """Makes the parsed game read-only so it can be shared between sessions."""
+        if self.__dict__.get('_frozen'):
+            return
+        self.quarters = MappingProxyType(self.quarters)
+        self.opp_quarters = MappingProxyType(self.opp_quarters)
+        self.players = tuple(self.players)
+        self.shooters = tuple(self.shooters)
+        self.plays = tuple(MappingProxyType(play) for play in self.plays)
+        for array in (self.box, self.period_stats, self.shots):
+            array.flags.writeable = False
+        self._frozen = True
 
 # XML Parsing (condensed version)
 def parse_game(xml_file):
     tree = ET.parse(xml_file)
     root = tree.getroot()
     game = GameData()
+    # When the file was written - decides which version of a corrected game wins
+    game.generated = parse_timestamp(root.get('generated'))
     
     venue = root.find('venue')
     if venue is not None:
         game.date = venue.get('date', '')
         game.opponent = venue.get('visname', '') if venue.get('homeid') == 'COL' else venue.get('homename', '')
         game.home_away = 'Home' if venue.get('homeid') == 'COL' else 'Away'
+        game.home_id = venue.get('homeid', '')
+        game.vis_id = venue.get('visid', '')
+        game.location = venue.get('location', '')
     
+    cu_team = opp_team = None
     for team in root.findall('team'):
         team_id = (team.get('id') or '').upper()
-        if any(key in team_id for key in ['COL', 'COLO', 'COLORADO']):
+        if cu_team is None and any(key in team_id for key in ['COL', 'COLO', 'COLORADO']):
             cu_team = team
-            break
-
+        elif opp_team is None:
+            opp_team = team
+        # Team ids missing from <venue> can be recovered from the team's home/visitor flag
+        if team.get('vh') == 'H' and not game.home_id:
+            game.home_id = team.get('id', '')
+        elif team.get('vh') == 'V' and not game.vis_id:
+            game.vis_id = team.get('id', '')
     
     if cu_team is None:
         return None
     
-    cu_linescore = cu_team.find('linescore')
-    if cu_linescore is not None:
-        game.cu_score = safe_int(cu_linescore.get('score'), 0)
-        line_parts = cu_linescore.get('line', '').split(',')
-        for i, score in enumerate(line_parts[:4], 1):
-            game.quarters[str(i)] = safe_int(score, 0)
+    # The same game re-exported or corrected by the stats crew keeps this identity.
+    # Without a date and both teams it is left empty and the file's content hash is
+    # used instead, so incomplete files are never mistaken for corrections.
+    if game.date and game.home_id and game.vis_id:
+        game.game_id = '|'.join([game.date, game.home_id, game.vis_id, game.location])
+    
+    # Linescores carry one entry per period, including overtimes
+    game.cu_score = parse_linescore(cu_team, game.quarters)
+    if opp_team is not None:
+        game.opp_score = parse_linescore(opp_team, game.opp_quarters)
+    game.num_periods = max(REGULATION_PERIODS, len(game.quarters), len(game.opp_quarters))
     
     game.result = 'W' if game.cu_score > game.opp_score else 'L'
     game.is_close_game = abs(game.cu_score - game.opp_score) <= 5
     
-    for player in cu_team.findall('player'):
+    # Preallocate players x stats blocks; unused rows are trimmed below
+    players = cu_team.findall('player')
+    game.box = np.zeros((len(players), len(BOX_STATS)), dtype=np.int32)
+    game.period_stats = np.zeros((len(players), game.num_periods, len(PERIOD_STATS)), dtype=np.int32)
+    
+    for player in players:
         checkname = player.get('checkname', '')
         roster_name = get_roster_name(checkname)
         
@@ -198,166 +440,344 @@ def parse_game(xml_file):
         if stats_elem is None:
             continue
         
-        player_game_stats = {
-            'name': roster_name,
-            'minutes': safe_int(stats_elem.get('min'), 0),
-            'points': safe_int(stats_elem.get('tp'), 0),
-            'fgm': safe_int(stats_elem.get('fgm'), 0),
-            'fga': safe_int(stats_elem.get('fga'), 0),
-            'fgm3': safe_int(stats_elem.get('fgm3'), 0),
-            'fga3': safe_int(stats_elem.get('fga3'), 0),
-            'ftm': safe_int(stats_elem.get('ftm'), 0),
-            'fta': safe_int(stats_elem.get('fta'), 0),
-            'oreb': safe_int(stats_elem.get('oreb'), 0),
-            'dreb': safe_int(stats_elem.get('dreb'), 0),
-            'rebounds': safe_int(stats_elem.get('treb'), 0),
-            'assists': safe_int(stats_elem.get('ast'), 0),
-            'steals': safe_int(stats_elem.get('stl'), 0),
-            'blocks': safe_int(stats_elem.get('blk'), 0),
-            'turnovers': safe_int(stats_elem.get('to'), 0),
-            'plus_minus': safe_int(stats_elem.get('plusminus'), 0),
-            'paint_points': safe_int(stats_elem.get('pts_paint'), 0),
-            'fastbreak_points': safe_int(stats_elem.get('pts_fastb'), 0),
-            'second_chance_points': safe_int(stats_elem.get('pts_ch2'), 0),
-            'quarter_stats': {}
-        }
+        row = len(game.players)
+        extract_row(stats_elem, BOX_STATS, game.box[row])
         
-        for qtr in range(1, 5):
-            qtr_elem = player.find(f"statsbyprd[@prd='{qtr}']")
-            if qtr_elem is not None:
-                player_game_stats['quarter_stats'][qtr] = {
-                    'minutes': safe_int(qtr_elem.get('min'), 0),
-                    'points': safe_int(qtr_elem.get('tp'), 0),
-                    'fgm': safe_int(qtr_elem.get('fgm'), 0),
-                    'fga': safe_int(qtr_elem.get('fga'), 0),
-                }
+        for prd_elem in player.iter('statsbyprd'):
+            prd = safe_int(prd_elem.get('prd'), 0)
+            if prd <= 0:
+                continue
+            if prd > game.num_periods:
+                pad = prd - game.num_periods
+                game.period_stats = np.pad(game.period_stats, ((0, 0), (0, pad), (0, 0)))
+                game.num_periods = prd
+            extract_row(prd_elem, PERIOD_STATS, game.period_stats[row, prd - 1])
         
-        game.player_stats[roster_name] = player_game_stats
+        game.players.append(roster_name)
     
-    # Parse plays for assist network
+    game.box = game.box[:len(game.players)]
+    game.period_stats = game.period_stats[:len(game.players)]
+    
+    # Parse plays for assist network and shot profile
+    shooters = {}
+    shots = []
     plays_elem = root.find('plays')
     if plays_elem is not None:
-        for play in plays_elem.findall('play'):
+        for play in plays_elem.iter('play'):
             if play.get('team') == 'COL':
                 play_data = {
                     'action': play.get('action', ''),
                     'checkname': play.get('checkname', ''),
+                    'type': play.get('type', ''),
                     'paint': play.get('paint', 'N'),
+                    'x': safe_float(play.get('x'), None),
+                    'y': safe_float(play.get('y'), None),
+                    'shot_clock': safe_float(play.get('shotclock'), None),
                     'assist_by': None
                 }
                 
                 if play_data['action'] == 'ASSIST':
                     if game.plays and game.plays[-1]['action'] == 'GOOD':
                         game.plays[-1]['assist_by'] = play_data['checkname']
-                else:
-                    game.plays.append(play_data)
+                    continue
+                
+                game.plays.append(play_data)
+                shooter = get_roster_name(play_data['checkname'])
+                if shooter and is_field_goal(play_data):
+                    distance = shot_distance(play_data['x'], play_data['y'])
+                    shots.append((
+                        shooters.setdefault(shooter, len(shooters)),
+                        shot_zone(play_data, distance),
+                        play_data['action'] == 'GOOD',
+                        math.nan if distance is None else distance,
+                        math.nan if play_data['shot_clock'] is None else play_data['shot_clock'],
+                    ))
     
+    game.shooters = list(shooters)
+    game.shots = np.array(shots, dtype=np.float32).reshape(-1, 5)
     return game
 
-def aggregate_stats(games):
+def is_field_goal(play):
+    return play['action'] in ('GOOD', 'MISS') and play['type'] != 'FT'
+
+def shot_distance(x, y):
+    if x is None or y is None:
+        return None
+    # Measure to whichever basket is closer
+    depth = min(x, COURT_LENGTH - x) - BASKET_OFFSET
+    return math.hypot(depth, y - COURT_WIDTH / 2)
+
+def shot_zone(play, distance):
+    if play['type'] == '3PTR':
+        return SHOT_ZONES.index('Three')
+    if play['paint'] == 'Y' or play['type'] in PAINT_SHOT_TYPES:
+        return SHOT_ZONES.index('Paint')
+    if not play['type'] and distance is not None and distance >= THREE_POINT_DISTANCE:
+        return SHOT_ZONES.index('Three')
+    return SHOT_ZONES.index('Mid-Range')
+
+def parse_linescore(team, periods):
+    linescore = team.find('linescore')
+    if linescore is None:
+        return 0
+    line = linescore.get('line', '')
+    for i, score in enumerate(line.split(',') if line else [], 1):
+        periods[str(i)] = safe_int(score, 0)
+    return safe_int(linescore.get('score'), 0)
+
+def period_label(period):
+    if period <= REGULATION_PERIODS:
+        return f"Q{period}"
+    return f"OT{period - REGULATION_PERIODS}" if period > REGULATION_PERIODS + 1 else "OT"
+
+class PeriodMatrix:
+    """Season totals as a dense players x periods x PERIOD_STATS array."""
+
+    def __init__(self, players, num_periods=REGULATION_PERIODS):
+        self.players = list(players)
+        self.index = {name: i for i, name in enumerate(self.players)}
+        self.stat_index = {stat: i for i, (stat, _) in enumerate(PERIOD_STATS)}
+        self.values = np.zeros((len(self.players), num_periods, len(PERIOD_STATS)), dtype=np.int64)
+
+    def copy(self):
+        matrix = PeriodMatrix(self.players)
+        matrix.values = self.values.copy()
+        return matrix
+
+    @property
+    def num_periods(self):
+        return self.values.shape[1]
+
+    @property
+    def labels(self):
+        return [period_label(prd) for prd in range(1, self.num_periods + 1)]
+
+    def add_game(self, game, sign=1):
+        if game.num_periods > self.num_periods:
+            pad = game.num_periods - self.num_periods
+            self.values = np.pad(self.values, ((0, 0), (0, pad), (0, 0)))
+        rows = [self.index.get(name, -1) for name in game.players]
+        keep = [i for i, row in enumerate(rows) if row >= 0]
+        # Player rows are unique within a game, so fancy-index += is safe
+        self.values[[rows[i] for i in keep], :game.num_periods] += sign * game.period_stats[keep]
+
+    def player(self, name):
+        return self.values[self.index[name]]
+
+    def stat(self, stat):
+        return self.values[:, :, self.stat_index[stat]]
+
+    def quarter(self, quarter):
+        return self.values[:, quarter - 1]
+
+    def half(self, half):
+        return self.values[:, 2 * (half - 1):2 * half].sum(axis=1)
+
+    def regulation(self):
+        return self.values[:, :REGULATION_PERIODS].sum(axis=1)
+
+    def overtime(self):
+        return self.values[:, REGULATION_PERIODS:].sum(axis=1)
+
+class ShotProfile:
+    """Season shot counts per player by zone, distance band and shot clock.
+
+    Shots from any number of games are concatenated and binned with a single
+    np.bincount per table, so cost scales with the shot count, not the games.
+    """
+
+    TABLES = ('zone_fgm', 'zone_fga', 'distance_fgm', 'distance_fga', 'late_fgm', 'late_fga')
+
+    def __init__(self, players):
+        self.players = list(players)
+        self.index = {name: i for i, name in enumerate(self.players)}
+        n = len(self.players)
+        self.zone_fgm = np.zeros((n, len(SHOT_ZONES)), dtype=np.int64)
+        self.zone_fga = np.zeros((n, len(SHOT_ZONES)), dtype=np.int64)
+        self.distance_fgm = np.zeros((n, len(DISTANCE_BANDS) + 1), dtype=np.int64)
+        self.distance_fga = np.zeros((n, len(DISTANCE_BANDS) + 1), dtype=np.int64)
+        self.late_fgm = np.zeros(n, dtype=np.int64)
+        self.late_fga = np.zeros(n, dtype=np.int64)
+
+    def copy(self):
+        profile = ShotProfile(self.players)
+        for table in self.TABLES:
+            setattr(profile, table, getattr(self, table).copy())
+        return profile
+
+    def freeze(self):
+        for table in self.TABLES:
+            getattr(self, table).flags.writeable = False
+
+    def add_games(self, games, sign=1):
+        rows, shots = [], []
+        for game in games:
+            if len(game.shots):
+                shooter_rows = np.array([self.index.get(name, -1) for name in game.shooters])
+                rows.append(shooter_rows[game.shots[:, SHOT_SHOOTER].astype(np.intp)])
+                shots.append(game.shots)
+        if not shots:
+            return
+        
+        player = np.concatenate(rows)
+        shots = np.concatenate(shots)[player >= 0]
+        player = player[player >= 0]
+        made = shots[:, SHOT_MADE]
+        
+        zone = shots[:, SHOT_ZONE].astype(np.intp)
+        self.zone_fga += sign * self._histogram(player, zone, len(SHOT_ZONES))
+        self.zone_fgm += sign * self._histogram(player, zone, len(SHOT_ZONES), made)
+        
+        located = ~np.isnan(shots[:, SHOT_DISTANCE])
+        band = np.digitize(shots[located, SHOT_DISTANCE], DISTANCE_BANDS)
+        self.distance_fga += sign * self._histogram(player[located], band, len(DISTANCE_BANDS) + 1)
+        self.distance_fgm += sign * self._histogram(player[located], band, len(DISTANCE_BANDS) + 1, made[located])
+        
+        # NaN (no shot clock recorded) compares False, so those shots are never late
+        late = shots[:, SHOT_CLOCK] <= LATE_CLOCK_SECONDS
+        self.late_fga += sign * np.bincount(player[late], minlength=len(self.players))
+        self.late_fgm += sign * np.bincount(player[late], weights=made[late], minlength=len(self.players)).astype(np.int64)
+
+    def _histogram(self, player, bins, nbins, weights=None):
+        cells = player * nbins + bins
+        counts = np.bincount(cells, weights=weights, minlength=len(self.players) * nbins)
+        return counts.reshape(-1, nbins).astype(np.int64)
+
+    @staticmethod
+    def _pct(made, attempts):
+        return np.divide(made, attempts, out=np.zeros(made.shape), where=attempts > 0) * 100
+
+    def zone_fg_pct(self):
+        return self._pct(self.zone_fgm, self.zone_fga)
+
+    def distance_fg_pct(self):
+        return self._pct(self.distance_fgm, self.distance_fga)
+
+    def late_fg_pct(self):
+        return self._pct(self.late_fgm, self.late_fga)
+
+    def zone_expected_points(self):
+        return self.zone_fg_pct() / 100 * np.array(ZONE_POINTS)
+
+    def expected_points(self):
+        points = self.zone_fgm @ np.array(ZONE_POINTS)
+        attempts = self.zone_fga.sum(axis=1)
+        return np.divide(points, attempts, out=np.zeros(len(self.players)), where=attempts > 0)
+
+def distance_labels():
+    edges = (0,) + DISTANCE_BANDS
+    return [f"{lo}-{hi} ft" for lo, hi in zip(edges, edges[1:])] + [f"{edges[-1]}+ ft"]
+
+# Game identity
+class GameIndex:
+    """Games keyed by identity (date, teams, venue), in upload order.
+
+    Of two versions of the same game the later-generated file wins, with the
+    content hash as tie-breaker, so the outcome never depends on upload order.
+    """
+
+    def __init__(self, games=()):
+        self.games = OrderedDict((game.game_id, game) for game in games)
+
+    @staticmethod
+    def revision(game):
+        return (game.generated, game.content_hash)
+
+    def add(self, game):
+        """Returns (status, replaced game) where status is 'added', 'duplicate',
+        'replaced' or 'superseded' (an older version of an indexed game)."""
+        current = self.games.get(game.game_id)
+        if current is None:
+            self.games[game.game_id] = game
+            return 'added', None
+        if current.content_hash == game.content_hash:
+            return 'duplicate', None
+        if self.revision(game) < self.revision(current):
+            return 'superseded', None
+        self.games[game.game_id] = game
+        return 'replaced', current
+
+def game_players(game):
+    names = set(game.players)
+    for play in game.plays:
+        names.add(get_roster_name(play['checkname']))
+        if play['assist_by']:
+            names.add(get_roster_name(play['assist_by']))
+    names.discard(None)
+    return names
+
+def new_player_stats():
     player_stats = {}
-    
     for checkname, info in CU_ROSTER.items():
         player_name = info['name']
         player_stats[player_name] = PlayerStats(player_name, info['number'], info['pos'])
-    
-    for game in games:
-        for player_name, game_stats in game.player_stats.items():
-            if player_name not in player_stats:
-                continue
-            
-            stats = player_stats[player_name]
-            
-            if game_stats['minutes'] > 0:
-                stats.games += 1
-            
-            stats.minutes += game_stats['minutes']
-            stats.points += game_stats['points']
-            stats.fgm += game_stats['fgm']
-            stats.fga += game_stats['fga']
-            stats.fgm3 += game_stats['fgm3']
-            stats.fga3 += game_stats['fga3']
-            stats.ftm += game_stats['ftm']
-            stats.fta += game_stats['fta']
-            stats.oreb += game_stats['oreb']
-            stats.dreb += game_stats['dreb']
-            stats.assists += game_stats['assists']
-            stats.steals += game_stats['steals']
-            stats.blocks += game_stats['blocks']
-            stats.turnovers += game_stats['turnovers']
-            stats.plus_minus += game_stats['plus_minus']
-            stats.paint_points += game_stats['paint_points']
-            stats.fastbreak_points += game_stats['fastbreak_points']
-            stats.second_chance_points += game_stats['second_chance_points']
-            
+    return player_stats
+
+def bump(counter, key, sign):
+    counter[key] += sign
+    if counter[key] <= 0:
+        del counter[key]
+
+def apply_game(player_stats, game, sign=1):
+    """Adds (sign=1) or removes (sign=-1) one game's contribution to season totals."""
+    minutes, points, fgm, fga, rebounds, assists, plus_minus = (
+        BOX_INDEX[stat] for stat in ('minutes', 'points', 'fgm', 'fga', 'rebounds', 'assists', 'plus_minus')
+    )
+    for player_name, box in zip(game.players, game.box.tolist()):
+        if player_name not in player_stats:
+            continue
+        
+        stats = player_stats[player_name]
+        stats.totals = [total + sign * value for total, value in zip(stats.totals, box)]
+        
+        if box[minutes] > 0:
+            stats.games += sign
+        
+        if sign > 0:
             stats.game_log.append({
+                'game_id': game.game_id,
                 'date': game.date,
                 'opponent': game.opponent,
                 'result': game.result,
-                'points': game_stats['points'],
-                'rebounds': game_stats['rebounds'],
-                'assists': game_stats['assists'],
-                'plus_minus': game_stats['plus_minus'],
+                'home_away': game.home_away,
+                'points': box[points],
+                'rebounds': box[rebounds],
+                'assists': box[assists],
+                'plus_minus': box[plus_minus],
                 'is_close': game.is_close_game,
             })
-            
-             # Quarter stats (safe aggregation)
-            for qtr, qtr_stats in (game_stats.get('quarter_stats') or {}).items():
-                qtr = int(qtr)
-                if qtr not in stats.quarter_stats or not isinstance(stats.quarter_stats[qtr], dict):
-                    stats.quarter_stats[qtr] = {'points': 0, 'minutes': 0, 'fgm': 0, 'fga': 0}
-
-            for key in ['points', 'minutes', 'fgm', 'fga']:
-                stats.quarter_stats[qtr][key] = (
-                    stats.quarter_stats[qtr].get(key, 0)
-                    + qtr_stats.get(key, 0)
-                )
-
-
-
-            
-            if game.is_close_game and game_stats['minutes'] > 0:
-                stats.close_game_stats['points'] += game_stats['points']
-                stats.close_game_stats['fgm'] += game_stats['fgm']
-                stats.close_game_stats['fga'] += game_stats['fga']
-                stats.close_game_stats['plus_minus'] += game_stats['plus_minus']
+        else:
+            stats.game_log = [g for g in stats.game_log if g['game_id'] != game.game_id]
+        
+        if game.is_close_game and box[minutes] > 0:
+            stats.close_game_stats['points'] += sign * box[points]
+            stats.close_game_stats['fgm'] += sign * box[fgm]
+            stats.close_game_stats['fga'] += sign * box[fga]
+            stats.close_game_stats['plus_minus'] += sign * box[plus_minus]
     
-    # Process plays for shot location
+    # Process made field goals for the assist network
+    for play in game.plays:
+        if play['action'] != 'GOOD' or not is_field_goal(play):
+            continue
+        player_name = get_roster_name(play['checkname'])
+        if not player_name or player_name not in player_stats:
+            continue
+        
+        stats = player_stats[player_name]
+        if play['assist_by']:
+            stats.assisted_fgm += sign
+            assister_name = get_roster_name(play['assist_by'])
+            if assister_name:
+                bump(stats.assisted_by, assister_name, sign)
+                if assister_name in player_stats:
+                    bump(player_stats[assister_name].assists_to, player_name, sign)
+        else:
+            stats.unassisted_fgm += sign
+
+def aggregate_stats(games):
+    player_stats = new_player_stats()
     for game in games:
-        for play in game.plays:
-            player_name = get_roster_name(play['checkname'])
-            if not player_name or player_name not in player_stats:
-                continue
-            
-            stats = player_stats[player_name]
-            
-            if play['action'] == 'GOOD':
-                if play['paint'] == 'Y':
-                    stats.paint_fgm += 1
-                    stats.paint_fga += 1
-                else:
-                    stats.perimeter_fgm += 1
-                    stats.perimeter_fga += 1
-                
-                if play['assist_by']:
-                    stats.assisted_fgm += 1
-                    assister = get_roster_name(play['assist_by'])
-                    if assister:
-                        stats.assisted_by[assister] += 1
-                else:
-                    stats.unassisted_fgm += 1
-            
-            elif play['action'] == 'MISS':
-                if play['paint'] == 'Y':
-                    stats.paint_fga += 1
-                else:
-                    stats.perimeter_fga += 1
-            
-            if play['action'] == 'GOOD' and play['assist_by']:
-                assister_name = get_roster_name(play['assist_by'])
-                if assister_name and assister_name in player_stats:
-                    player_stats[assister_name].assists_to[player_name] += 1
-    
+        apply_game(player_stats, game)
     return player_stats
 
 def calculate_metrics(player_stats, games):
@@ -369,9 +789,10 @@ def calculate_metrics(player_stats, games):
             stats.apg = safe_divide(stats.assists, stats.games, 1)
             stats.spg = safe_divide(stats.steals, stats.games, 1)
             stats.bpg = safe_divide(stats.blocks, stats.games, 1)
+            stats.pm_per_game = safe_divide(stats.plus_minus, stats.games, 1)
         else:
             stats.mpg = stats.ppg = stats.rpg = stats.apg = 0
-            stats.spg = stats.bpg = 0
+            stats.spg = stats.bpg = stats.pm_per_game = 0
         
         stats.fg_pct = safe_divide(stats.fgm, stats.fga, 3) * 100
         stats.fg3_pct = safe_divide(stats.fgm3, stats.fga3, 3) * 100
@@ -389,8 +810,6 @@ def calculate_metrics(player_stats, games):
         else:
             stats.pts_per_40 = stats.per = 0
         
-        stats.paint_fg_pct = safe_divide(stats.paint_fgm, stats.paint_fga, 3) * 100
-        stats.perimeter_fg_pct = safe_divide(stats.perimeter_fgm, stats.perimeter_fga, 3) * 100
         stats.assisted_fg_pct = safe_divide(stats.assisted_fgm, stats.fgm, 3) * 100 if stats.fgm > 0 else 0
         
         # Consistency
@@ -426,6 +845,876 @@ def calculate_metrics(player_stats, games):
         else:
             stats.close_game_impact = "Average"
 
+class LeaderboardIndex:
+    """Orderings of every LEADERBOARD_METRICS x LEADERBOARD_POOLS pair, built once per dataset."""
+
+    def __init__(self, player_stats):
+        self.players = list(player_stats.values())
+        self._index = {p.name: i for i, p in enumerate(self.players)}
+        self._orders = {}
+        self._ranks = {}
+        
+        values = {metric: np.array([key(p) for p in self.players], dtype=float)
+                  for metric, key in LEADERBOARD_METRICS.items()}
+        for pool, qualifies in LEADERBOARD_POOLS.items():
+            members = np.flatnonzero([qualifies(p) for p in self.players])
+            for metric, metric_values in values.items():
+                # Stable sort keeps roster order among ties, like sorted(..., reverse=True)
+                order = members[np.argsort(-metric_values[members], kind='stable')]
+                ranks = np.zeros(len(self.players), dtype=np.int64)
+                ranks[order] = np.arange(1, len(order) + 1)
+                self._orders[metric, pool] = order.tolist()
+                self._ranks[metric, pool] = ranks
+
+    def top(self, metric, k=None, pool='all'):
+        return [self.players[i] for i in self._orders[metric, pool][:k]]
+
+    def ranked(self, metric, pool='all'):
+        return (self.players[i] for i in self._orders[metric, pool])
+
+    def leader(self, metric, pool='all'):
+        order = self._orders[metric, pool]
+        return self.players[order[0]] if order else None
+
+    def rank(self, metric, name, pool='all'):
+        i = self._index.get(name)
+        rank = int(self._ranks[metric, pool][i]) if i is not None else 0
+        return rank or None
+
+def compute_two_player_combos(player_stats):
+    players_list = [p for p in player_stats.values() if p.games >= 3]
+    two_player_combos = []
+    
+    for i, p1 in enumerate(players_list):
+        for p2 in players_list[i+1:]:
+            combined_pm = p1.plus_minus + p2.plus_minus
+            games_together = min(p1.games, p2.games)
+            
+            if games_together >= 3:
+                chemistry = safe_divide(combined_pm, games_together, 1)
+                two_player_combos.append({
+                    'Players': f"{p1.name} & {p2.name}",
+                    'Games': games_together,
+                    'Combined +/-': combined_pm,
+                    'Chemistry': chemistry
+                })
+    
+    two_player_combos.sort(key=lambda x: x['Chemistry'], reverse=True)
+    return two_player_combos
+
+# Shared analysis cache
+class AnalysisCancelled(Exception):
+    pass
+
+class AnalysisResult:
+    """Read-only analyzed dataset, shared by every session that uploads the same files."""
+    __slots__ = ('key', 'games', 'player_stats', 'periods', 'shots', 'leaderboards', 'duplicates', 'corrections', 'superseded', 'nbytes')
+
+    def __init__(self, key, games, player_stats, periods, shots, duplicates, corrections, superseded, nbytes):
+        # Nested data is frozen too: games and player stats are shared between
+        # sessions and with results derived from this one
+        for game in games:
+            game.freeze()
+        for stats in player_stats.values():
+            stats.freeze()
+        periods.values.flags.writeable = False
+        shots.freeze()
+        object.__setattr__(self, 'key', key)
+        object.__setattr__(self, 'games', tuple(games))
+        object.__setattr__(self, 'player_stats', MappingProxyType(player_stats))
+        object.__setattr__(self, 'periods', periods)
+        object.__setattr__(self, 'shots', shots)
+        object.__setattr__(self, 'leaderboards', LeaderboardIndex(player_stats))
+        object.__setattr__(self, 'duplicates', duplicates)
+        object.__setattr__(self, 'corrections', corrections)
+        object.__setattr__(self, 'superseded', superseded)
+        object.__setattr__(self, 'nbytes', nbytes)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("AnalysisResult is read-only")
+
+class AnalysisCache:
+    """Process-wide LRU of AnalysisResults with single-flight computation."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute, cancel_event=None):
+        while True:
+            with self._lock:
+                result = self._entries.get(key)
+                if result is not None:
+                    self._entries.move_to_end(key)
+                    return result
+                future = self._inflight.get(key)
+                if future is None:
+                    future = self._inflight[key] = Future()
+                    break
+            
+            # Another session is already computing this key - wait for its result,
+            # taking over the computation if that session cancels
+            try:
+                return self._wait(future, cancel_event)
+            except AnalysisCancelled:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise
+                continue
+        
+        try:
+            result = compute()
+        except BaseException as exc:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(exc)
+            raise
+        
+        with self._lock:
+            del self._inflight[key]
+            self._store(key, result)
+        future.set_result(result)
+        return result
+
+    @staticmethod
+    def _wait(future, cancel_event):
+        if cancel_event is None:
+            return future.result()
+        while not cancel_event.is_set():
+            try:
+                return future.result(timeout=JOB_CANCEL_POLL_SECONDS)
+            except FutureTimeoutError:
+                continue
+        raise AnalysisCancelled()
+
+    def _store(self, key, result):
+        if result.nbytes > self.max_bytes:
+            return
+        self._entries[key] = result
+        self.nbytes += result.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+@st.cache_resource
+def get_analysis_cache():
+    return AnalysisCache(ANALYSIS_CACHE_MAX_BYTES)
+
+def analysis_key(files):
+    return frozenset(hashlib.sha256(data).hexdigest() for _, data in files)
+
+def analyze_files(files, key, job=None, base=None):
+    """Analyzes uploaded files, building on `base` when the upload only adds files to it.
+
+    Duplicate games are skipped and only the latest version of a corrected game
+    counts; only players appearing in changed games are recomputed. The duplicate,
+    correction and superseded counts describe this run only, not `base`.
+    """
+    incremental = base is not None and base.key <= key
+    if incremental:
+        index = GameIndex(base.games)
+        player_stats = dict(base.player_stats)
+        periods = base.periods.copy()
+        shots = base.shots.copy()
+        owned = set()
+    else:
+        index = GameIndex()
+        player_stats = new_player_stats()
+        periods = PeriodMatrix(player_stats)
+        shots = ShotProfile(player_stats)
+        owned = set(player_stats)
+    
+    seen = set()
+    duplicates = corrections = superseded = 0
+    added, removed = [], []
+    for _, data in files:
+        if job is not None and job.cancel_event.is_set():
+            raise AnalysisCancelled()
+        # Counted once the file is fully handled, so progress never runs ahead of parsing
+        try:
+            content_hash = hashlib.sha256(data).hexdigest()
+            if content_hash in seen:
+                duplicates += 1
+                continue
+            seen.add(content_hash)
+            if incremental and content_hash in base.key:
+                continue
+            
+            game = parse_game(io.BytesIO(data))
+            if not game:
+                continue
+            game.content_hash = content_hash
+            game.game_id = game.game_id or content_hash
+            status, previous = index.add(game)
+            if status == 'duplicate':
+                continue
+            if status == 'superseded':
+                superseded += 1
+                continue
+            
+            # Results are shared, so copy a player's stats before the first change
+            changed = [game] if previous is None else [previous, game]
+            for name in set().union(*map(game_players, changed)) & player_stats.keys() - owned:
+                player_stats[name] = player_stats[name].thawed()
+                owned.add(name)
+            
+            if previous is not None:
+                corrections += 1
+                apply_game(player_stats, previous, -1)
+                periods.add_game(previous, -1)
+                removed.append(previous)
+            apply_game(player_stats, game)
+            periods.add_game(game)
+            added.append(game)
+        finally:
+            if job is not None:
+                job.parsed += 1
+    
+    # Shot tables are binned once over every changed game
+    shots.add_games(added)
+    shots.add_games(removed, -1)
+    
+    games = list(index.games.values())
+    order = {game.game_id: i for i, game in enumerate(games)}
+    for name in owned:
+        player_stats[name].game_log.sort(key=lambda g: order[g['game_id']])
+    calculate_metrics({name: player_stats[name] for name in owned}, games)
+    
+    # Source XML size is a cheap proxy for the parsed result's footprint
+    nbytes = sum(len(data) for _, data in files) + periods.values.nbytes + sum(g.shots.nbytes for g in games)
+    return AnalysisResult(key, games, player_stats, periods, shots, duplicates, corrections, superseded, nbytes)
+
+# Background analysis jobs
+class AnalysisJob:
+    def __init__(self, job_id, total):
+        self.id = job_id
+        self.total = total
+        self.parsed = 0
+        self.cancel_event = threading.Event()
+        self.future = None
+        self.finished_at = None
+
+    @property
+    def status(self):
+        if self.cancel_event.is_set():
+            return 'cancelled'
+        if not self.future.done():
+            return 'running'
+        if self.future.exception() is not None:
+            return 'failed'
+        return 'done'
+
+class AnalysisJobManager:
+    """Runs analyses on a worker pool so the script thread never blocks on parsing."""
+
+    def __init__(self, cache, max_workers):
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis')
+        self._jobs = {}
+        self._lock = threading.Lock()
+        # Held across the whole save so concurrent jobs never interleave snapshot writes
+        self._snapshot_lock = threading.Lock()
+
+    def submit(self, files, base=None):
+        job = AnalysisJob(uuid.uuid4().hex, len(files))
+        job.future = self._executor.submit(self._run, files, job, base)
+        job.future.add_done_callback(lambda _: setattr(job, 'finished_at', time.monotonic()))
+        with self._lock:
+            self._expire()
+            self._jobs[job.id] = job
+        return job.id
+
+    def _expire(self):
+        # Results of abandoned jobs would otherwise stay alive outside the cache budget
+        cutoff = time.monotonic() - JOB_RETENTION_SECONDS
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.finished_at is not None and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _run(self, files, job, base):
+        key = analysis_key(files)
+        result = self.cache.get_or_compute(key, lambda: analyze_files(files, key, job, base), job.cancel_event)
+        if result.games:
+            try:
+                with self._snapshot_lock:
+                    save_snapshot(result)
+            except OSError:
+                pass
+        return result
+
+    def get(self, job_id):
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel_event.set()
+            job.future.cancel()
+
+    def discard(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+@st.cache_resource
+def get_job_manager():
+    return AnalysisJobManager(get_analysis_cache(), ANALYSIS_WORKERS)
+
+def publish_analysis(result):
+    st.session_state.analysis = result
+    st.session_state.games = result.games
+    st.session_state.player_stats = result.player_stats
+
+@st.fragment(run_every=1)
+def show_analysis_job():
+    manager = get_job_manager()
+    job_id = st.session_state.analysis_job
+    job = manager.get(job_id)
+    status = job.status if job is not None else 'cancelled'
+    
+    if status == 'running':
+        st.progress(
+            safe_divide(job.parsed, job.total, 3),
+            text=f"Processing games... {job.parsed}/{job.total}"
+        )
+        if st.button("✖ Cancel Analysis"):
+            manager.cancel(job_id)
+        return
+    
+    # Finished - publish into the session and rerun the whole page
+    manager.discard(job_id)
+    del st.session_state.analysis_job
+    if status == 'done':
+        result = job.future.result()
+        if result.games:
+            publish_analysis(result)
+            get_api_service().publish(result)
+            notes = []
+            if result.duplicates:
+                notes.append(f"{result.duplicates} duplicate file(s) skipped")
+            if result.corrections:
+                notes.append(f"{result.corrections} corrected game(s) replaced")
+            if result.superseded:
+                notes.append(f"{result.superseded} older version(s) ignored")
+            st.toast("✅ Analysis complete!" + (f" ({', '.join(notes)})" if notes else ""))
+        else:
+            st.toast("⚠️ No CU games found in the uploaded files")
+    elif status == 'failed':
+        st.toast(f"❌ Analysis failed: {job.future.exception()}")
+    else:
+        st.toast("Analysis cancelled")
+    st.rerun()
+
+# Season snapshot
+# Game metadata goes to manifest.json; box scores, period stats, shots and
+# plays are stored column-wise as .npy files memory-mapped on load.
+SNAPSHOT_FORMAT = 3
+SNAPSHOT_GAME_FIELDS = (
+    'date', 'opponent', 'cu_score', 'opp_score', 'result', 'home_away', 'quarters',
+    'opp_quarters', 'num_periods', 'is_close_game', 'home_id', 'vis_id', 'location',
+    'game_id', 'generated', 'content_hash', 'players', 'shooters',
+)
+# Play columns, in parse order: string fields with the value stored as -1, then numeric fields
+PLAY_STRING_FIELDS = (('action', ''), ('checkname', ''), ('type', ''), ('paint', 'N'), ('assist_by', None))
+PLAY_VALUE_FIELDS = ('x', 'y', 'shot_clock')
+PLAY_FIELDS = ('action', 'checkname', 'type', 'paint', 'x', 'y', 'shot_clock', 'assist_by')
+
+def snapshot_version(key):
+    lines = [f'format {SNAPSHOT_FORMAT}'] + sorted(key)
+    return hashlib.sha1('\n'.join(lines).encode('utf-8')).hexdigest()[:16]
+
+def current_snapshot(snapshot_dir=SNAPSHOT_DIR):
+    try:
+        with open(os.path.join(snapshot_dir, 'CURRENT')) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+def snapshot_manifest(version_dir):
+    """Returns the version's manifest, or None if it is missing or from another format."""
+    try:
+        with open(os.path.join(version_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get('format') == SNAPSHOT_FORMAT else None
+
+def save_snapshot(result, snapshot_dir=SNAPSHOT_DIR):
+    version = snapshot_version(result.key)
+    version_dir = os.path.join(snapshot_dir, version)
+    complete = snapshot_manifest(version_dir) is not None
+    if complete and current_snapshot(snapshot_dir) == version:
+        return
+    
+    # Versions without a current-format manifest are rewritten. Each is written
+    # under a unique temporary name and renamed into place, so a version
+    # directory is always complete.
+    if not complete:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        os.makedirs(snapshot_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=f'{version}.', suffix='.tmp', dir=snapshot_dir)
+        try:
+            write_snapshot(tmp_dir, result)
+            os.replace(tmp_dir, version_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.isdir(version_dir):
+                raise
+    
+    # Point CURRENT at the new version atomically, then drop every version it doesn't name
+    fd, pointer = tempfile.mkstemp(prefix='CURRENT.', suffix='.tmp', dir=snapshot_dir)
+    with os.fdopen(fd, 'w') as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(snapshot_dir, 'CURRENT'))
+    current = current_snapshot(snapshot_dir)
+    for entry in os.listdir(snapshot_dir):
+        if entry not in (current, 'CURRENT') and not entry.endswith('.tmp'):
+            shutil.rmtree(os.path.join(snapshot_dir, entry), ignore_errors=True)
+
+def write_snapshot(version_dir, result):
+    # Every play is kept with all of its columns: strings are encoded against one
+    # shared table, coordinates and shot clock go to a float array (NaN for None)
+    strings = {}
+    plays, play_values = [], []
+    for game_idx, game in enumerate(result.games):
+        for play in game.plays:
+            plays.append([game_idx] + [
+                -1 if play[field] == default else strings.setdefault(play[field], len(strings))
+                for field, default in PLAY_STRING_FIELDS
+            ])
+            play_values.append([math.nan if play[field] is None else play[field] for field in PLAY_VALUE_FIELDS])
+    
+    num_periods = max(game.num_periods for game in result.games)
+    periods = np.concatenate([
+        np.pad(game.period_stats, ((0, 0), (0, num_periods - game.num_periods), (0, 0)))
+        for game in result.games
+    ])
+    
+    np.save(os.path.join(version_dir, 'box.npy'), np.concatenate([game.box for game in result.games]))
+    np.save(os.path.join(version_dir, 'periods.npy'), periods)
+    np.save(os.path.join(version_dir, 'shots.npy'), np.concatenate([game.shots for game in result.games]))
+    np.save(os.path.join(version_dir, 'plays.npy'), np.array(plays, dtype=np.int32).reshape(-1, 1 + len(PLAY_STRING_FIELDS)))
+    np.save(os.path.join(version_dir, 'play_values.npy'), np.array(play_values, dtype=np.float64).reshape(-1, len(PLAY_VALUE_FIELDS)))
+    with open(os.path.join(version_dir, 'manifest.json'), 'w') as f:
+        json.dump({
+            'format': SNAPSHOT_FORMAT,
+            'key': sorted(result.key),
+            'duplicates': result.duplicates,
+            'corrections': result.corrections,
+            'superseded': result.superseded,
+            'strings': list(strings),
+            'shot_counts': [len(game.shots) for game in result.games],
+            'games': [{field: getattr(game, field) for field in SNAPSHOT_GAME_FIELDS} for game in result.games],
+        }, f, default=dict)
+
+def load_snapshot(version_dir, manifest):
+    box = np.load(os.path.join(version_dir, 'box.npy'), mmap_mode='r')
+    periods = np.load(os.path.join(version_dir, 'periods.npy'), mmap_mode='r')
+    shots = np.load(os.path.join(version_dir, 'shots.npy'), mmap_mode='r')
+    plays = np.load(os.path.join(version_dir, 'plays.npy'), mmap_mode='r')
+    play_values = np.load(os.path.join(version_dir, 'play_values.npy'), mmap_mode='r')
+    strings = manifest['strings']
+    
+    games = []
+    row = shot_row = 0
+    for fields, shot_count in zip(manifest['games'], manifest['shot_counts']):
+        game = GameData()
+        for field, value in fields.items():
+            setattr(game, field, value)
+        end = row + len(game.players)
+        game.box = box[row:end]
+        game.period_stats = periods[row:end, :game.num_periods]
+        game.shots = shots[shot_row:shot_row + shot_count]
+        row = end
+        shot_row += shot_count
+        games.append(game)
+    
+    for codes, values in zip(plays.tolist(), play_values.tolist()):
+        play = {field: strings[code] if code >= 0 else default for (field, default), code in zip(PLAY_STRING_FIELDS, codes[1:])}
+        play.update((field, None if math.isnan(value) else value) for field, value in zip(PLAY_VALUE_FIELDS, values))
+        games[codes[0]].plays.append({field: play[field] for field in PLAY_FIELDS})
+    
+    player_stats = aggregate_stats(games)
+    calculate_metrics(player_stats, games)
+    period_matrix = PeriodMatrix(player_stats)
+    for game in games:
+        period_matrix.add_game(game)
+    shot_profile = ShotProfile(player_stats)
+    shot_profile.add_games(games)
+    
+    nbytes = box.nbytes + periods.nbytes + shots.nbytes + plays.nbytes + play_values.nbytes + period_matrix.values.nbytes
+    return AnalysisResult(
+        frozenset(manifest['key']), games, player_stats, period_matrix, shot_profile,
+        manifest['duplicates'], manifest['corrections'], manifest['superseded'], nbytes
+    )
+
+def restore_snapshot(snapshot_dir=SNAPSHOT_DIR):
+    version = current_snapshot(snapshot_dir)
+    if version is None:
+        return None
+    version_dir = os.path.join(snapshot_dir, version)
+    # Snapshots written by another layout are ignored and replaced on the next save
+    manifest = snapshot_manifest(version_dir)
+    if manifest is None:
+        return None
+    try:
+        key = frozenset(manifest['key'])
+        return get_analysis_cache().get_or_compute(key, lambda: load_snapshot(version_dir, manifest))
+    except (OSError, ValueError, KeyError, IndexError):
+        return None
+
+# Local stats API
+def player_slug(name):
+    return '-'.join(name.lower().split())
+
+def player_summary(stats):
+    return {
+        'name': stats.name,
+        'number': stats.number,
+        'position': stats.position,
+        'games': stats.games,
+        'mpg': stats.mpg,
+        'ppg': stats.ppg,
+        'rpg': stats.rpg,
+        'apg': stats.apg,
+        'spg': stats.spg,
+        'bpg': stats.bpg,
+        'fg_pct': stats.fg_pct,
+        'fg3_pct': stats.fg3_pct,
+        'efg_pct': stats.efg_pct,
+        'ts_pct': stats.ts_pct,
+        'per': stats.per,
+        'plus_minus': stats.plus_minus,
+        'paint_points': stats.paint_points,
+        'fastbreak_points': stats.fastbreak_points,
+        'second_chance_points': stats.second_chance_points,
+    }
+
+def player_splits(stats):
+    groups = {
+        'home': lambda g: g['home_away'] == 'Home',
+        'away': lambda g: g['home_away'] == 'Away',
+        'wins': lambda g: g['result'] == 'W',
+        'losses': lambda g: g['result'] == 'L',
+        'close': lambda g: g['is_close'],
+    }
+    splits = {}
+    for split, matches in groups.items():
+        log = [g for g in stats.game_log if matches(g)]
+        splits[split] = {
+            'games': len(log),
+            'ppg': safe_divide(sum(g['points'] for g in log), len(log), 1),
+            'rpg': safe_divide(sum(g['rebounds'] for g in log), len(log), 1),
+            'apg': safe_divide(sum(g['assists'] for g in log), len(log), 1),
+            'plus_minus': sum(g['plus_minus'] for g in log),
+        }
+    return splits
+
+def build_api_payloads(result):
+    players = [p for p in result.player_stats.values() if p.games > 0]
+    payloads = {
+        '/api/players': [player_summary(p) for p in players],
+        '/api/games': [{
+            'date': g.date,
+            'opponent': g.opponent,
+            'home_away': g.home_away,
+            'result': g.result,
+            'cu_score': g.cu_score,
+            'opp_score': g.opp_score,
+            'is_close': g.is_close_game,
+        } for g in result.games],
+        '/api/lineups': compute_two_player_combos(result.player_stats),
+        '/api/assists': [
+            {'from': p.name, 'to': target, 'assists': count}
+            for p in players
+            for target, count in p.assists_to.most_common()
+        ],
+    }
+    labels = result.periods.labels
+    for p in players:
+        base = f"/api/players/{player_slug(p.name)}"
+        splits = player_splits(p)
+        splits['periods'] = {
+            label: {stat: int(value) for (stat, _), value in zip(PERIOD_STATS, row)}
+            for label, row in zip(labels, result.periods.player(p.name))
+        }
+        payloads[base] = player_summary(p)
+        payloads[f"{base}/games"] = p.game_log
+        payloads[f"{base}/splits"] = splits
+    return payloads
+
+class StatsStore:
+    """Serialized, compressed and ETagged API responses for one analyzed dataset."""
+
+    def __init__(self):
+        self.key = None
+        self.responses = {}
+
+    def publish(self, result):
+        responses = {}
+        for path, payload in build_api_payloads(result).items():
+            body = json.dumps(payload, default=dict).encode('utf-8')
+            etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+            responses[path] = (body, gzip.compress(body), etag)
+        # Swap in one assignment so handler threads never see a partial dataset
+        self.key, self.responses = result.key, responses
+
+class StatsApiHandler:
+    """Request handling for the stats API, mixed into BaseHTTPRequestHandler by make_api_server."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path.startswith(EXPORT_ROUTE):
+            self._send_export(path[len(EXPORT_ROUTE):])
+            return
+        
+        response = self.server.store.responses.get(path)
+        if response is None:
+            self._send(404, json.dumps({'error': 'not found'}).encode('utf-8'))
+            return
+        
+        body, gzip_body, etag = response
+        if_none_match = self.headers.get('If-None-Match', '')
+        if if_none_match == '*' or etag in (tag.strip() for tag in if_none_match.split(',')):
+            self._send(304, b'', etag)
+        elif 'gzip' in self.headers.get('Accept-Encoding', ''):
+            self._send(200, gzip_body, etag, encoding='gzip')
+        else:
+            self._send(200, body, etag)
+
+    def _send(self, status, body, etag=None, encoding=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Vary', 'Accept-Encoding')
+        if etag:
+            self.send_header('ETag', etag)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_export(self, name):
+        # Only files export_file() wrote are served; anything path-like is not found
+        try:
+            if os.path.basename(name) != name or name.endswith('.tmp'):
+                raise FileNotFoundError(name)
+            f = open(os.path.join(self.server.export_dir, name), 'rb')
+        except (FileNotFoundError, IsADirectoryError):
+            self._send(404, json.dumps({'error': 'not found'}).encode('utf-8'))
+            return
+        
+        # Streamed from disk in chunks, so memory stays flat whatever the export size
+        with f:
+            compress = name.endswith('.gz')
+            fmt = name[:-3 if compress else None].rsplit('.', 1)[-1]
+            self.send_response(200)
+            self.send_header('Content-Type', export_mime(fmt, compress))
+            self.send_header('Content-Length', str(os.fstat(f.fileno()).st_size))
+            self.send_header('Content-Disposition', f'attachment; filename="cu_basketball_{name.split("-", 1)[-1].replace("-", "_")}"')
+            self.end_headers()
+            try:
+                shutil.copyfileobj(f, self.wfile, EXPORT_CHUNK_BYTES)
+            except ConnectionError:
+                # Client cancelled the download part-way
+                self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+def make_api_server(host=API_HOST, port=API_PORT):
+    # Imported here so sessions that never start the API don't pay for http.server
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    handler = type('StatsApiHandler', (StatsApiHandler, BaseHTTPRequestHandler), {})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.store = StatsStore()
+    server.export_dir = EXPORT_DIR
+    return server
+
+class StatsApiService:
+    """One API server per process, serving the most recently analyzed season.
+
+    Started and stopped from any session; every session's finished analysis
+    replaces the published dataset, so all clients see the same season.
+    """
+
+    def __init__(self, host=API_HOST, port=API_PORT):
+        self.host = host
+        self.port = port
+        self.store = StatsStore()
+        self.latest = None
+        self.server = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self):
+        return self.server is not None
+
+    def start(self):
+        with self._lock:
+            if self.server is not None:
+                return
+            server = make_api_server(self.host, self.port)
+            server.store = self.store
+            if self.latest is not None and self.store.key != self.latest.key:
+                self.store.publish(self.latest)
+            threading.Thread(target=server.serve_forever, name='stats-api', daemon=True).start()
+            self.server = server
+
+    def stop(self):
+        with self._lock:
+            if self.server is None:
+                return
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+    def publish(self, result):
+        with self._lock:
+            self.latest = result
+            # Serialized lazily on start when nobody is serving
+            if self.server is not None and self.store.key != result.key:
+                self.store.publish(result)
+
+@st.cache_resource
+def get_api_service():
+    return StatsApiService()
+
+def read_xml_files(paths):
+    """Reads XML files, expanding folders, as (name, bytes) pairs like the uploader's."""
+    files = []
+    for path in paths:
+        xml_paths = sorted(glob.glob(os.path.join(path, '*.xml'))) if os.path.isdir(path) else [path]
+        for xml_path in xml_paths:
+            with open(xml_path, 'rb') as f:
+                files.append((xml_path, f.read()))
+    return files
+
+def serve_api(paths):
+    files = read_xml_files(paths)
+    server = make_api_server()
+    server.store.publish(analyze_files(files, analysis_key(files)))
+    print(f"Serving stats for {len(files)} files on http://{API_HOST}:{API_PORT}/api/players")
+    server.serve_forever()
+
+# Streaming export
+def export_records(result, record):
+    if record == 'players':
+        for stats in result.leaderboards.ranked('ppg', 'played'):
+            yield player_summary(stats)
+    elif record == 'game_logs':
+        for stats in result.player_stats.values():
+            for entry in stats.game_log:
+                yield {'player': stats.name, **entry}
+    elif record == 'plays':
+        for game in result.games:
+            for play in game.plays:
+                yield {'game_id': game.game_id, 'date': game.date, **play}
+
+def stream_export(result, records, fmt='ndjson', compress=False):
+    """Yields the export as byte chunks of roughly EXPORT_CHUNK_BYTES, optionally gzipped."""
+    compressor = zlib.compressobj(wbits=31) if compress else None
+    buffer = io.StringIO()
+    
+    def drain():
+        data = buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+        return compressor.compress(data) if compressor else data
+    
+    if fmt == 'ndjson':
+        buffer.write(json.dumps({
+            'record': 'metadata',
+            'total_games': len(result.games),
+            'generated': datetime.now().isoformat()
+        }) + '\n')
+    
+    for record in records:
+        fields = EXPORT_FIELDS[record]
+        if fmt == 'csv':
+            writer = csv.DictWriter(buffer, fields, restval='', extrasaction='ignore')
+            writer.writeheader()
+        for row in export_records(result, record):
+            if fmt == 'csv':
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps({'record': record, **{f: row.get(f) for f in fields}}) + '\n')
+            if buffer.tell() >= EXPORT_CHUNK_BYTES:
+                chunk = drain()
+                if chunk:
+                    yield chunk
+    
+    chunk = drain()
+    if compressor:
+        chunk += compressor.flush()
+    if chunk:
+        yield chunk
+
+def export_version(result):
+    # Rows follow game order and the winning version of each game, neither of
+    # which the key (a set of files) captures
+    lines = [f'format {EXPORT_FORMAT}'] + sorted(result.key) + [game.content_hash for game in result.games]
+    return hashlib.sha1('\n'.join(lines).encode('utf-8')).hexdigest()[:16]
+
+def export_mime(fmt, compress):
+    return 'application/gzip' if compress else ('text/csv' if fmt == 'csv' else 'application/x-ndjson')
+
+def export_path(result, records, fmt='ndjson', compress=False, export_dir=EXPORT_DIR):
+    name = f"{export_version(result)}-{'-'.join(records)}.{fmt}" + ('.gz' if compress else '')
+    return os.path.join(export_dir, name)
+
+def export_file(result, records, fmt='ndjson', compress=False, export_dir=EXPORT_DIR):
+    version = export_version(result)
+    path = export_path(result, records, fmt, compress, export_dir)
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+    
+    os.makedirs(export_dir, exist_ok=True)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as f:
+        for chunk in stream_export(result, records, fmt, compress):
+            f.write(chunk)
+    os.replace(tmp_path, path)
+    prune_exports(export_dir, version)
+    return path
+
+def prune_exports(export_dir, version, keep=EXPORT_KEEP_VERSIONS):
+    """Drops cached exports of all but the `keep` most recently used datasets."""
+    last_used = {}
+    for entry in os.scandir(export_dir):
+        if entry.name.endswith('.tmp'):
+            continue
+        try:
+            mtime = entry.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        entry_version = entry.name.split('-', 1)[0]
+        last_used[entry_version] = max(mtime, last_used.get(entry_version, mtime))
+    
+    last_used.pop(version, None)
+    stale = set(sorted(last_used, key=last_used.get, reverse=True)[keep - 1:])
+    for entry in os.scandir(export_dir):
+        if entry.name.split('-', 1)[0] in stale and not entry.name.endswith('.tmp'):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+def load_export(result, records, fmt='ndjson', compress=False):
+    # Another session may prune the file between lookup and read - regenerate it once
+    try:
+        with open(export_file(result, records, fmt, compress), 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        with open(export_file(result, records, fmt, compress), 'rb') as f:
+            return f.read()
+
 # Main App
 def main():
     st.markdown('<div class="main-header"><h1>🏀 CU Women\'s Basketball Analytics</h1><p>Complete Performance Dashboard - Cloud Edition</p></div>', unsafe_allow_html=True)
@@ -443,26 +1732,23 @@ def main():
         if uploaded_files:
             st.success(f"✅ {len(uploaded_files)} files uploaded")
             
-            if st.button("🚀 Analyze Games", type="primary"):
-                with st.spinner("Processing games..."):
-                    # Save uploaded files temporarily
-                    games = []
-                    for uploaded_file in uploaded_files:
-                        with tempfile.NamedTemporaryFile(delete=False, suffix='.xml') as tmp_file:
-                            tmp_file.write(uploaded_file.getvalue())
-                            tmp_file_path = tmp_file.name
-                        
-                        game = parse_game(tmp_file_path)
-                        if game:
-                            games.append(game)
-                        os.unlink(tmp_file_path)
-                    
-                    if games:
-                        st.session_state.games = games
-                        st.session_state.player_stats = aggregate_stats(games)
-                        calculate_metrics(st.session_state.player_stats, games)
-                        st.success("✅ Analysis complete!")
-                        st.rerun()
+            job_running = 'analysis_job' in st.session_state
+            if st.button("🚀 Analyze Games", type="primary", disabled=job_running):
+                files = [(f.name, f.getvalue()) for f in uploaded_files]
+                st.session_state.analysis_job = get_job_manager().submit(files, st.session_state.get('analysis'))
+        
+        if 'analysis_job' in st.session_state:
+            show_analysis_job()
+    
+    # Cold start - pick up the last analyzed season instead of an empty page
+    if 'games' not in st.session_state and 'analysis_job' not in st.session_state:
+        result = restore_snapshot()
+        if result is not None:
+            publish_analysis(result)
+            api = get_api_service()
+            if api.latest is None:
+                api.publish(result)
+            st.sidebar.caption(f"Restored last analyzed season ({len(result.games)} games)")
     
     # Main content
     if 'games' not in st.session_state:
@@ -484,6 +1770,9 @@ def main():
         """)
         return
     
+    # Deferred so the landing page renders without importing pandas
+    import pandas as pd
+    
     # Create tabs - ALL 9 TABS!
     tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9 = st.tabs([
         "📊 Overview", 
@@ -499,6 +1788,8 @@ def main():
     
     games = st.session_state.get("games", [])
     player_stats = st.session_state.get("player_stats", {})
+    leaderboards = st.session_state.analysis.leaderboards
+    shots = st.session_state.analysis.shots
 
 
     
@@ -533,13 +1824,12 @@ def main():
         
         st.subheader("🎯 Top Recommendations")
         
-        active_players = [p for p in player_stats.values() if p.games >= 3]
+        top_scorer = leaderboards.leader('ppg', 'qualified')
         
-        if active_players:
-            top_scorer = max(active_players, key=lambda p: p.ppg)
+        if top_scorer:
             st.markdown(f'<div class="recommendation"><strong>1. Maximize {top_scorer.name}\'s offensive impact</strong> - Leading scorer at {top_scorer.ppg:.1f} PPG. Increase touches in crucial moments.</div>', unsafe_allow_html=True)
             
-            pm_leader = max(active_players, key=lambda p: p.plus_minus)
+            pm_leader = leaderboards.leader('plus_minus', 'qualified')
             if pm_leader.plus_minus > 0:
                 st.markdown(f'<div class="recommendation"><strong>2. Build around {pm_leader.name}\'s presence</strong> - Team +{pm_leader.plus_minus} with them on court. Consider extending minutes.</div>', unsafe_allow_html=True)
         
@@ -556,11 +1846,8 @@ def main():
     with tab2:
         st.header("Individual Player Analysis")
         
-        sorted_players = sorted(
-            [p for p in player_stats.values() if p.games > 0],
-            key=lambda p: p.ppg,
-            reverse=True
-        )
+        sorted_players = leaderboards.top('ppg', pool='played')
+        zone_pct = shots.zone_fg_pct()
         
         for player in sorted_players:
             with st.expander(f"**#{player.number} {player.name}** ({player.position}) - {player.ppg:.1f} PPG, {player.rpg:.1f} RPG, {player.apg:.1f} APG"):
@@ -583,11 +1870,10 @@ def main():
                     st.metric("+/-", f"{player.plus_minus:+d}")
                 
                 st.subheader("🎯 Shot Selection")
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.write(f"**Paint FG%:** {player.paint_fg_pct:.1f}% ({player.paint_fgm}/{player.paint_fga})")
-                with col2:
-                    st.write(f"**Perimeter FG%:** {player.perimeter_fg_pct:.1f}% ({player.perimeter_fgm}/{player.perimeter_fga})")
+                row = shots.index[player.name]
+                for col, zone, fgm, fga, pct in zip(st.columns(len(SHOT_ZONES)), SHOT_ZONES, shots.zone_fgm[row], shots.zone_fga[row], zone_pct[row]):
+                    with col:
+                        st.write(f"**{zone} FG%:** {pct:.1f}% ({fgm}/{fga})")
                 
                 st.subheader("💯 Scoring Breakdown")
                 col1, col2, col3 = st.columns(3)
@@ -621,24 +1907,7 @@ def main():
         
         st.subheader("👥 Top Two-Player Combinations")
         
-        players_list = [p for p in player_stats.values() if p.games >= 3]
-        two_player_combos = []
-        
-        for i, p1 in enumerate(players_list):
-            for p2 in players_list[i+1:]:
-                combined_pm = p1.plus_minus + p2.plus_minus
-                games_together = min(p1.games, p2.games)
-                
-                if games_together >= 3:
-                    chemistry = safe_divide(combined_pm, games_together, 1)
-                    two_player_combos.append({
-                        'Players': f"{p1.name} & {p2.name}",
-                        'Games': games_together,
-                        'Combined +/-': combined_pm,
-                        'Chemistry': chemistry
-                    })
-        
-        two_player_combos.sort(key=lambda x: x['Chemistry'], reverse=True)
+        two_player_combos = compute_two_player_combos(player_stats)
         
         df = pd.DataFrame(two_player_combos[:10])
         st.dataframe(df, use_container_width=True)
@@ -655,11 +1924,10 @@ def main():
         st.subheader("🎯 Close Game Performance")
         st.write("Games decided by 5 points or less")
         
-        close_game_players = [p for p in player_stats.values() if p.close_game_stats['plus_minus'] != 0]
-        close_game_players.sort(key=lambda p: p.close_game_stats['plus_minus'], reverse=True)
+        close_game_players = (p for p in leaderboards.ranked('clutch_plus_minus') if p.close_game_stats['plus_minus'] != 0)
         
         close_data = []
-        for player in close_game_players[:10]:
+        for player in itertools.islice(close_game_players, 10):
             close_data.append({
                 'Player': player.name,
                 '+/-': player.close_game_stats['plus_minus'],
@@ -671,13 +1939,43 @@ def main():
             df = pd.DataFrame(close_data)
             st.dataframe(df, use_container_width=True)
         
+        st.subheader("⏱️ Production by Period")
+        periods = st.session_state.analysis.periods
+        period_stat = st.selectbox("Stat", [stat for stat, _ in PERIOD_STATS], index=1, key='period_stat')
+        col = periods.stat_index[period_stat]
+        
+        df = pd.DataFrame(periods.stat(period_stat), index=periods.players, columns=periods.labels)
+        df['1st Half'] = periods.half(1)[:, col]
+        df['2nd Half'] = periods.half(2)[:, col]
+        if periods.num_periods > REGULATION_PERIODS:
+            df['Total OT'] = periods.overtime()[:, col]
+        st.dataframe(df[df.sum(axis=1) > 0], use_container_width=True)
+        
+        st.subheader("🏹 Shot Profile")
+        st.write("Field goal % and expected points per shot by zone")
+        df = pd.DataFrame(index=shots.players)
+        zone_pct = shots.zone_fg_pct()
+        zone_eps = shots.zone_expected_points()
+        for i, zone in enumerate(SHOT_ZONES):
+            df[f'{zone} FGA'] = shots.zone_fga[:, i]
+            df[f'{zone} FG%'] = zone_pct[:, i].round(1)
+            df[f'{zone} Pts/Shot'] = zone_eps[:, i].round(2)
+        df['Pts/Shot'] = shots.expected_points().round(2)
+        df['Late Clock FG%'] = shots.late_fg_pct().round(1)
+        st.dataframe(df[shots.zone_fga.sum(axis=1) > 0], use_container_width=True)
+        
+        if shots.distance_fga.any():
+            st.write("Field goal % by shot distance (plays with court coordinates)")
+            df = pd.DataFrame(shots.distance_fg_pct().round(1), index=shots.players, columns=distance_labels())
+            st.dataframe(df[shots.distance_fga.sum(axis=1) > 0], use_container_width=True)
+        
         st.subheader("🔥 Key Insights")
-        if active_players:
-            most_efficient = max([p for p in active_players if p.fga >= 20], key=lambda p: p.ts_pct, default=None)
-            if most_efficient:
-                st.info(f"**Most Efficient Scorer:** {most_efficient.name} with {most_efficient.ts_pct:.1f}% TS%")
-            
-            best_defender = max(active_players, key=lambda p: p.spg + p.bpg)
+        most_efficient = leaderboards.leader('ts_pct', 'qualified_shooters')
+        if most_efficient:
+            st.info(f"**Most Efficient Scorer:** {most_efficient.name} with {most_efficient.ts_pct:.1f}% TS%")
+        
+        best_defender = leaderboards.leader('stocks', 'qualified')
+        if best_defender:
             st.info(f"**Best Defender:** {best_defender.name} with {best_defender.spg:.1f} SPG + {best_defender.bpg:.1f} BPG")
     
     # TAB 5: DEFENSE
@@ -686,11 +1984,8 @@ def main():
         
         st.subheader("🛡️ Defensive Leaders")
         
-        defensive_players = [p for p in player_stats.values() if p.games >= 3]
-        defensive_players.sort(key=lambda p: (p.spg + p.bpg), reverse=True)
-        
         defense_data = []
-        for player in defensive_players[:10]:
+        for player in leaderboards.top('stocks', 10, 'qualified'):
             impact_score = player.spg + player.bpg
             if impact_score >= 3:
                 impact = "Elite"
@@ -722,11 +2017,10 @@ def main():
         
         st.subheader("⚡ Transition Performance")
         
-        tempo_players = [p for p in player_stats.values() if p.fastbreak_points > 0]
-        tempo_players.sort(key=lambda p: p.fastbreak_points, reverse=True)
+        tempo_players = (p for p in leaderboards.ranked('fastbreak_points') if p.fastbreak_points > 0)
         
         tempo_data = []
-        for player in tempo_players[:10]:
+        for player in itertools.islice(tempo_players, 10):
             transition_pct = safe_divide(player.fastbreak_points, player.points, 1) * 100
             tempo_data.append({
                 'Player': player.name,
@@ -750,11 +2044,8 @@ def main():
         
         st.subheader("🔥 Clutch Ratings")
         
-        clutch_players = [p for p in player_stats.values() if p.games >= 3]
-        clutch_players.sort(key=lambda p: p.close_game_stats['plus_minus'], reverse=True)
-        
         clutch_data = []
-        for player in clutch_players[:10]:
+        for player in leaderboards.top('clutch_plus_minus', 10, 'qualified'):
             # Calculate clutch rating
             clutch_pm = player.close_game_stats['plus_minus']
             if clutch_pm > 20:
@@ -787,11 +2078,8 @@ def main():
         
         st.subheader("🔁 Minutes Distribution")
         
-        rotation_players = [p for p in player_stats.values() if p.games > 0]
-        rotation_players.sort(key=lambda p: p.mpg, reverse=True)
-        
         rotation_data = []
-        for player in rotation_players:
+        for player in leaderboards.ranked('mpg', 'played'):
             rotation_data.append({
                 'Player': player.name,
                 'GP': player.games,
@@ -815,11 +2103,10 @@ def main():
         st.subheader("🎯 Close Game Performance")
         st.write("Games decided by 5 points or less")
         
-        close_game_players = [p for p in player_stats.values() if p.close_game_stats['plus_minus'] != 0]
-        close_game_players.sort(key=lambda p: p.close_game_stats['plus_minus'], reverse=True)
+        close_game_players = (p for p in leaderboards.ranked('clutch_plus_minus') if p.close_game_stats['plus_minus'] != 0)
         
         close_data = []
-        for player in close_game_players[:10]:
+        for player in itertools.islice(close_game_players, 10):
             close_data.append({
                 'Player': player.name,
                 '+/-': player.close_game_stats['plus_minus'],
@@ -832,45 +2119,58 @@ def main():
             st.dataframe(df, use_container_width=True)
         
         st.subheader("🔥 Key Insights")
-        if active_players:
-            most_efficient = max([p for p in active_players if p.fga >= 20], key=lambda p: p.ts_pct, default=None)
-            if most_efficient:
-                st.info(f"**Most Efficient Scorer:** {most_efficient.name} with {most_efficient.ts_pct:.1f}% TS%")
-            
-            best_defender = max(active_players, key=lambda p: p.spg + p.bpg)
+        most_efficient = leaderboards.leader('ts_pct', 'qualified_shooters')
+        if most_efficient:
+            st.info(f"**Most Efficient Scorer:** {most_efficient.name} with {most_efficient.ts_pct:.1f}% TS%")
+        
+        best_defender = leaderboards.leader('stocks', 'qualified')
+        if best_defender:
             st.info(f"**Best Defender:** {best_defender.name} with {best_defender.spg:.1f} SPG + {best_defender.bpg:.1f} BPG")
     
-    # Download option
+    # Local stats API - shared by every session of this app process
     st.sidebar.markdown("---")
-    if st.sidebar.button("💾 Download JSON Data"):
-        json_data = {
-            'metadata': {
-                'total_games': len(games),
-                'generated': datetime.now().isoformat()
-            },
-            'players': {}
-        }
-        
-        for name, stats in player_stats.items():
-            if stats.games == 0:
-                continue
-            
-            json_data['players'][name] = {
-                'name': stats.name,
-                'games': stats.games,
-                'ppg': stats.ppg,
-                'rpg': stats.rpg,
-                'apg': stats.apg,
-                'fg_pct': stats.fg_pct,
-                'plus_minus': stats.plus_minus
-            }
-        
+    api = get_api_service()
+    if api.running:
+        st.sidebar.caption(f"🔌 Stats API serving the latest analyzed season at http://{api.host}:{api.port}/api/players")
+        if st.sidebar.button("Stop Local Stats API", help="Stops the API for all sessions"):
+            api.stop()
+            st.rerun()
+    elif st.sidebar.button("🔌 Start Local Stats API", help="JSON endpoints for video and scouting tools, serving the latest analyzed season"):
+        if api.latest is None:
+            api.publish(st.session_state.analysis)
+        try:
+            api.start()
+            st.rerun()
+        except OSError as exc:
+            st.sidebar.error(f"Could not start the stats API on port {api.port}: {exc.strerror or exc}")
+    
+    # Download option - generated on click, then served from the per-dataset cache
+    st.sidebar.markdown("---")
+    st.sidebar.subheader("💾 Export Data")
+    export_format = st.sidebar.selectbox("Format", list(EXPORT_FORMATS), key='export_format')
+    compress = st.sidebar.checkbox("Gzip", key='export_gzip')
+    fmt, records = EXPORT_FORMATS[export_format]
+    analysis = st.session_state.analysis
+    path = export_path(analysis, records, fmt, compress)
+    
+    if analysis.nbytes <= EXPORT_INLINE_MAX_BYTES:
         st.sidebar.download_button(
-            label="📥 Download JSON",
-            data=json.dumps(json_data, indent=2),
-            file_name='cu_basketball_data.json',
-            mime='application/json'
+            label="📥 Download",
+            data=lambda: load_export(analysis, records, fmt, compress),
+            file_name=f"cu_basketball_{'_'.join(records)}.{fmt}" + ('.gz' if compress else ''),
+            mime=export_mime(fmt, compress)
         )
+    elif not api.running:
+        st.sidebar.info("Large dataset - start the Local Stats API to download exports")
+    elif os.path.exists(path):
+        # Large exports stream from disk through the API rather than sitting in session memory
+        st.sidebar.markdown(f"[📥 Download](http://{api.host}:{api.port}{EXPORT_ROUTE}{os.path.basename(path)})")
+    elif st.sidebar.button("Prepare Export"):
+        export_file(analysis, records, fmt, compress)
+        st.rerun()
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) > 2 and sys.argv[1] == '--serve-api':
+        serve_api(sys.argv[2:])
+    else:
+        main()